@@ -4,10 +4,11 @@ from __future__ import annotations
 import argparse
 import json
 import ssl
-import urllib.error
 import urllib.parse
-import urllib.request
-from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, AsyncIterator
+
+import aiohttp
+from aiohttp import web
 
 
 DEFAULT_ALLOWED_ORIGINS = (
@@ -109,43 +110,41 @@ def upstream_candidates(url: str) -> list[str]:
     return out
 
 
-def build_upstream_request(url: str) -> urllib.request.Request:
-    return urllib.request.Request(
-        url,
-        headers={
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/127.0.0.0 Safari/537.36"
-            ),
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.9",
-            "Referer": "https://chatgpt.com/",
-            "Cache-Control": "no-cache",
-            "Pragma": "no-cache",
-        },
-    )
+UA_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/127.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Referer": "https://chatgpt.com/",
+    "Cache-Control": "no-cache",
+    "Pragma": "no-cache",
+}
+
+# Parsing the CA bundle is slow; do it once at import rather than per session.
+_SSL_CTX = ssl.create_default_context()
 
+ALLOWED_ORIGINS_KEY = web.AppKey("allowed_origins", object)
+RETRIES_KEY = web.AppKey("retries", int)
+TIMEOUT_KEY = web.AppKey("timeout", int)
+SESSION_KEY = web.AppKey("session", aiohttp.ClientSession)
 
-def fetch_html(url: str, retries: int, timeout: int) -> tuple[int, str]:
-    context = ssl.create_default_context()
+
+async def fetch_html(session: aiohttp.ClientSession, url: str, retries: int) -> tuple[int, str]:
     candidates = upstream_candidates(url)
     for idx, candidate in enumerate(candidates):
         last_status = 502
         last_text = "upstream_fetch_failed"
         for _ in range(max(retries, 1)):
             try:
-                req = build_upstream_request(candidate)
-                with urllib.request.urlopen(req, timeout=timeout, context=context) as resp:
-                    text = resp.read().decode("utf-8", errors="replace")
+                async with session.get(candidate, headers=UA_HEADERS) as resp:
+                    text = await resp.text(errors="replace")
                     if 200 <= resp.status < 300:
                         return 200, text
                     last_status = int(resp.status)
                     last_text = text
-            except urllib.error.HTTPError as exc:
-                body = exc.read().decode("utf-8", errors="replace")
-                last_status = int(exc.code)
-                last_text = body
             except Exception as exc:  # noqa: BLE001
                 last_status = 502
                 last_text = f"upstream_fetch_failed: {exc}"
@@ -156,93 +155,100 @@ def fetch_html(url: str, retries: int, timeout: int) -> tuple[int, str]:
     return 502, "upstream_fetch_failed"
 
 
-class ProxyHandler(BaseHTTPRequestHandler):
-    allowed_origins: set[str] | None = None
-    timeout: int = 35
-    retries: int = 3
-
-    def do_OPTIONS(self) -> None:  # noqa: N802
-        headers = build_headers(self.headers.get("Origin"), self.allowed_origins)
-        self.send_response(204)
-        for key, value in headers.items():
-            self.send_header(key, value)
-        self.end_headers()
-
-    def do_GET(self) -> None:  # noqa: N802
-        origin = self.headers.get("Origin")
-        cors = build_headers(origin, self.allowed_origins)
-        if not is_allowed_origin(origin, self.allowed_origins):
-            self._json_response(
-                403,
-                {"error": "origin_not_allowed", "detail": "Origin is not allowed."},
-                cors,
-            )
-            return
-
-        parsed = urllib.parse.urlparse(self.path)
-        if parsed.path == "/health":
-            self._json_response(200, {"ok": True}, cors)
-            return
-
-        if parsed.path != "/fetch":
-            self._json_response(404, {"error": "not_found"}, cors)
-            return
-
-        query = urllib.parse.parse_qs(parsed.query)
-        target = (query.get("url") or [""])[0].strip()
-        if not target:
-            self._json_response(400, {"error": "missing_url_param"}, cors)
-            return
-        if not is_allowed_share_url(target):
-            self._json_response(
-                400,
-                {
-                    "error": "target_not_allowed",
-                    "detail": "Only https://chatgpt.com/share/... is allowed.",
-                },
-                cors,
-            )
-            return
-
-        status, text = fetch_html(target, retries=self.retries, timeout=self.timeout)
-        self.send_response(200 if 200 <= status < 300 else status)
-        for key, value in cors.items():
-            self.send_header(key, value)
-        self.send_header("Cache-Control", "no-store")
-        self.send_header("Content-Type", "text/html; charset=utf-8")
-        self.end_headers()
-        self.wfile.write(text.encode("utf-8", errors="replace"))
-
-    def _json_response(self, status: int, payload: dict[str, object], cors: dict[str, str]) -> None:
-        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
-        self.send_response(status)
-        for key, value in cors.items():
-            self.send_header(key, value)
-        self.send_header("Cache-Control", "no-store")
-        self.send_header("Content-Type", "application/json; charset=utf-8")
-        self.send_header("Content-Length", str(len(body)))
-        self.end_headers()
-        self.wfile.write(body)
-
-    def log_message(self, fmt: str, *args: object) -> None:
-        return
+def json_response(status: int, payload: dict[str, object], cors: dict[str, str]) -> web.Response:
+    return web.json_response(
+        payload,
+        status=status,
+        headers={**cors, "Cache-Control": "no-store"},
+        dumps=lambda obj: json.dumps(obj, ensure_ascii=False),
+    )
+
+
+@web.middleware
+async def cors_middleware(request: web.Request, handler: Any) -> web.StreamResponse:
+    allowed = request.app[ALLOWED_ORIGINS_KEY]
+    origin = request.headers.get("Origin")
+    cors = build_headers(origin, allowed)
+    if request.method == "OPTIONS":
+        return web.Response(status=204, headers=cors)
+    if not is_allowed_origin(origin, allowed):
+        return json_response(
+            403,
+            {"error": "origin_not_allowed", "detail": "Origin is not allowed."},
+            cors,
+        )
+    try:
+        response = await handler(request)
+    except web.HTTPNotFound:
+        return json_response(404, {"error": "not_found"}, cors)
+    response.headers.update(cors)
+    return response
+
+
+def request_cors(request: web.Request) -> dict[str, str]:
+    return build_headers(request.headers.get("Origin"), request.app[ALLOWED_ORIGINS_KEY])
+
+
+async def health_handler(request: web.Request) -> web.Response:
+    return json_response(200, {"ok": True}, request_cors(request))
+
+
+async def fetch_handler(request: web.Request) -> web.Response:
+    target = request.query.get("url", "").strip()
+    if not target:
+        return json_response(400, {"error": "missing_url_param"}, request_cors(request))
+    if not is_allowed_share_url(target):
+        return json_response(
+            400,
+            {
+                "error": "target_not_allowed",
+                "detail": "Only https://chatgpt.com/share/... is allowed.",
+            },
+            request_cors(request),
+        )
+
+    app = request.app
+    status, text = await fetch_html(app[SESSION_KEY], target, retries=app[RETRIES_KEY])
+    return web.Response(
+        status=200 if 200 <= status < 300 else status,
+        text=text,
+        content_type="text/html",
+        charset="utf-8",
+        headers={"Cache-Control": "no-store"},
+    )
+
+
+async def client_session_ctx(app: web.Application) -> AsyncIterator[None]:
+    # One pooled session for the whole process so upstream connections are reused.
+    connector = aiohttp.TCPConnector(
+        limit=200,
+        limit_per_host=50,
+        ssl=_SSL_CTX,
+    )
+    timeout = aiohttp.ClientTimeout(total=app[TIMEOUT_KEY])
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        app[SESSION_KEY] = session
+        yield
+
+
+def build_app(allowed_origins: set[str] | None, timeout: int, retries: int) -> web.Application:
+    app = web.Application(middlewares=[cors_middleware])
+    app[ALLOWED_ORIGINS_KEY] = allowed_origins
+    app[TIMEOUT_KEY] = timeout
+    app[RETRIES_KEY] = retries
+    app.cleanup_ctx.append(client_session_ctx)
+    app.router.add_get("/health", health_handler)
+    app.router.add_get("/fetch", fetch_handler)
+    return app
 
 
 def serve(host: str, port: int, allowed_origins: set[str] | None, timeout: int, retries: int) -> None:
-    ProxyHandler.allowed_origins = allowed_origins
-    ProxyHandler.timeout = timeout
-    ProxyHandler.retries = retries
-    server = ThreadingHTTPServer((host, port), ProxyHandler)
+    app = build_app(allowed_origins, timeout=timeout, retries=retries)
     shown = "*" if allowed_origins is None else ",".join(sorted(allowed_origins))
     print(f"[proxy] listening on http://{host}:{port}")
     print(f"[proxy] allowed origins: {shown}")
     print("[proxy] endpoint: /fetch?url=https%3A%2F%2Fchatgpt.com%2Fshare%2F...")
-    try:
-        server.serve_forever()
-    except KeyboardInterrupt:
-        pass
-    finally:
-        server.server_close()
+    web.run_app(app, host=host, port=port, print=None, access_log=None)
 
 
 def main() -> None:
@@ -2,27 +2,48 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
+import gzip
+import hashlib
 import json
+import os
 import re
 import ssl
 import time
-import urllib.error
-import urllib.request
+import zlib
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
+import aiohttp
+import orjson
+import xlsxwriter
 from openpyxl import Workbook, load_workbook
 
 
-SHARE_LINK_RE = re.compile(r"^https://chatgpt\.com/share/[A-Za-z0-9\-]+/?(?:\?.*)?$")
+SHARE_LINK_RE = re.compile(r"https://chatgpt\.com/share/[A-Za-z0-9\-]+/?(?:\?.*)?")
 FLIGHT_PAYLOAD_RE = re.compile(
     r'window\.__reactRouterContext\.streamController\.enqueue\("(\[.*?\])\\n"\);',
     re.S,
 )
+THOUGHT_FOR_RE = re.compile(r"thought\s+for\s+([0-9]+(?:\.[0-9]+)?)\s*(?:s|seconds?)", re.I)
 CODE_BLOCK_RE = re.compile(r"```(?:[\w.+-]+)?\n(.*?)```", re.S)
-ILLEGAL_XML_RE = re.compile(r"[\x00-\x08\x0B-\x0C\x0E-\x1F]")
+UA_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/124.0.0.0 Safari/537.36"
+    )
+}
+
+_SSL_CTX = ssl.create_default_context()
+
+# Code points that are not valid XML 1.0 characters, mapped to None for str.translate.
+_XML_TABLE: dict[int, None] = {c: None for c in range(0x20) if c not in (0x9, 0xA, 0xD)}
+_XML_TABLE.update({c: None for c in range(0xD800, 0xE000)})
+_XML_TABLE[0xFFFE] = None
+_XML_TABLE[0xFFFF] = None
 
 
 @dataclass
@@ -44,6 +65,60 @@ class ExtractionError(RuntimeError):
     pass
 
 
+class HtmlCache:
+    def __init__(self, root: Path, ttl_seconds: float = 24 * 3600, max_entries: int = 512) -> None:
+        self.root = root
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+    def _path(self, url: str) -> Path:
+        return self.root / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.html.gz"
+
+    def get(self, url: str) -> str | None:
+        path = self._path(url)
+        try:
+            stat = path.stat()
+            if time.time() - stat.st_mtime > self.ttl_seconds:
+                return None
+            with gzip.open(path, "rt", encoding="utf-8") as fh:
+                text = fh.read()
+            # Bump atime explicitly (mounts are often noatime) so eviction sees recent reads.
+            os.utime(path, (time.time(), stat.st_mtime))
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, ValueError, zlib.error):
+            # A truncated, corrupt or non-UTF-8 entry is a miss; drop it so the page is re-fetched.
+            path.unlink(missing_ok=True)
+            return None
+        return text
+
+    def put(self, url: str, text: str) -> None:
+        path = self._path(url)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=3) as fh:
+                fh.write(text)
+            os.replace(tmp_path, path)
+            self._evict()
+        except OSError:
+            # The cache is best-effort; a full or read-only disk must not fail the student.
+            tmp_path.unlink(missing_ok=True)
+
+    def _evict(self) -> None:
+        entries = []
+        for path in self.root.glob("*.html.gz"):
+            try:
+                entries.append((path.stat().st_atime, path))
+            except OSError:
+                continue
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort()
+        for _, path in entries[: len(entries) - self.max_entries]:
+            path.unlink(missing_ok=True)
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Pilot extractor for ChatGPT share links (c.2 + c.1994)."
@@ -75,29 +150,31 @@ def parse_args() -> argparse.Namespace:
         default=35,
         help="HTTP timeout in seconds.",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Maximum number of share pages fetched at once.",
+    )
     parser.add_argument(
         "--status-file",
         default=None,
         help="Status xlsx path. Default: <output-dir>/_pilot_status.xlsx",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always re-download share pages instead of reusing <output-dir>/.cache.",
+    )
     return parser.parse_args()
 
 
 def xml_safe(value: Any) -> str:
-    if value is None:
-        return ""
-    text = str(value)
-    text = ILLEGAL_XML_RE.sub("", text)
-    return "".join(ch for ch in text if is_xml_char(ord(ch)))
+    return "" if value is None else str(value).translate(_XML_TABLE)
 
 
-def is_xml_char(codepoint: int) -> bool:
-    return (
-        codepoint in (0x9, 0xA, 0xD)
-        or 0x20 <= codepoint <= 0xD7FF
-        or 0xE000 <= codepoint <= 0xFFFD
-        or 0x10000 <= codepoint <= 0x10FFFF
-    )
+def is_valid_share_link(link: str) -> bool:
+    return SHARE_LINK_RE.fullmatch(link) is not None
 
 
 def safe_sheet_title(raw: str) -> str:
@@ -106,69 +183,41 @@ def safe_sheet_title(raw: str) -> str:
     return cleaned[:31]
 
 
-def read_targets(metadata_path: Path, wanted_students: set[str]) -> tuple[list[TargetRecord], list[StatusRecord]]:
+def read_metadata(metadata_path: Path, wanted_students: set[str] | None = None) -> dict[str, str]:
     wb = load_workbook(metadata_path, data_only=True, read_only=True)
     ws = wb["metadata"] if "metadata" in wb.sheetnames else wb.active
 
-    found: dict[str, TargetRecord] = {}
-    for row in ws.iter_rows(min_row=2, values_only=True):
-        name_dot = (row[1] or "").strip() if len(row) >= 2 and isinstance(row[1], str) else ""
-        link = (row[2] or "").strip() if len(row) >= 3 and isinstance(row[2], str) else ""
-        if name_dot in wanted_students and name_dot not in found:
-            found[name_dot] = TargetRecord(name_dot=name_dot, link=link)
-    wb.close()
-
-    missing_status = []
-    for student in sorted(wanted_students):
-        if student not in found:
-            missing_status.append(
-                StatusRecord(
-                    name_dot=student,
-                    link="",
-                    status="failed",
-                    reason="student_not_found",
-                    round_count=0,
-                )
-            )
-
-    ordered_targets = [found[s] for s in sorted(found)]
-    return ordered_targets, missing_status
-
-
-def read_all_name_dots(metadata_path: Path) -> set[str]:
-    wb = load_workbook(metadata_path, data_only=True, read_only=True)
-    ws = wb["metadata"] if "metadata" in wb.sheetnames else wb.active
-
-    students: set[str] = set()
-    for row in ws.iter_rows(min_row=2, values_only=True):
-        if len(row) >= 2 and isinstance(row[1], str):
-            name_dot = row[1].strip()
-            if name_dot:
-                students.add(name_dot)
+    links: dict[str, str] = {}
+    wanted_count = len(wanted_students) if wanted_students is not None else -1
+    for row in ws.iter_rows(min_row=2, max_col=3, values_only=True):
+        width = len(row)
+        raw_name = row[1] if width >= 2 else None
+        name_dot = raw_name.strip() if isinstance(raw_name, str) else ""
+        if not name_dot or name_dot in links:
+            continue
+        if wanted_students is not None and name_dot not in wanted_students:
+            continue
+        raw_link = row[2] if width >= 3 else None
+        links[name_dot] = raw_link.strip() if isinstance(raw_link, str) else ""
+        if len(links) == wanted_count:
+            break
     wb.close()
-    return students
+    return links
 
 
-def fetch_html(url: str, retries: int, timeout: int) -> str:
+async def fetch_html(session: aiohttp.ClientSession, url: str, retries: int) -> str:
     last_exc: Exception | None = None
-    request = urllib.request.Request(
-        url,
-        headers={
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/124.0.0.0 Safari/537.36"
-            )
-        },
-    )
     for attempt in range(1, retries + 1):
         try:
-            with urllib.request.urlopen(request, timeout=timeout, context=ssl.create_default_context()) as resp:
-                return resp.read().decode("utf-8", errors="replace")
+            async with session.get(url, headers=UA_HEADERS) as resp:
+                text = await resp.text(errors="replace")
+                if 200 <= resp.status < 300:
+                    return text
+                last_exc = ExtractionError(f"http_{resp.status}")
         except Exception as exc:  # noqa: BLE001
             last_exc = exc
-            if attempt < retries:
-                time.sleep(0.8 * attempt)
+        if attempt < retries:
+            await asyncio.sleep(0.8 * attempt)
     assert last_exc is not None
     raise last_exc
 
@@ -185,9 +234,13 @@ def decode_payload(html: str) -> list[Any]:
     except json.JSONDecodeError as exc:
         raise ExtractionError("payload_string_decode_failed") from exc
     try:
-        payload = json.loads(raw)
-    except json.JSONDecodeError as exc:
-        raise ExtractionError("payload_json_decode_failed") from exc
+        payload = orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        # orjson rejects a few inputs the stdlib accepts (NaN/Infinity, lone surrogates).
+        try:
+            payload = json.loads(raw)
+        except json.JSONDecodeError as exc:
+            raise ExtractionError("payload_json_decode_failed") from exc
     if not isinstance(payload, list):
         raise ExtractionError("payload_not_list")
     return payload
@@ -213,31 +266,53 @@ def get_conversation(payload: list[Any]) -> dict[str, Any]:
     if conv_index is None:
         raise ExtractionError("conversation_object_missing")
 
-    @lru_cache(maxsize=None)
-    def resolve_index(index: int) -> Any:
-        value = payload[index]
-        if isinstance(value, dict):
-            output: dict[str, Any] = {}
-            for key, ref in value.items():
-                if isinstance(key, str) and key.startswith("_") and key[1:].isdigit():
-                    key_index = int(key[1:])
-                    real_key = payload[key_index] if 0 <= key_index < len(payload) else key
-                else:
-                    real_key = key
-                output[str(real_key)] = resolve_ref(ref)
-            return output
-        if isinstance(value, list):
-            return [resolve_ref(item) for item in value]
-        return value
+    # Flight values reference each other by payload index. Resolve them with an explicit
+    # worklist: each container gets an empty shell on first sight (memoized by index) and
+    # is filled in later, so deep or shared graphs never recurse.
+    payload_len = len(payload)
+    memo: dict[int, Any] = {}
+    key_memo: dict[str, str] = {}
+    pending: list[int] = []
+
+    def resolve_key(key: Any) -> str:
+        if isinstance(key, str) and key.startswith("_") and key[1:].isdigit():
+            key_index = int(key[1:])
+            return str(payload[key_index]) if 0 <= key_index < payload_len else key
+        return str(key)
 
     def resolve_ref(ref: Any) -> Any:
         if ref == -5:
             return None
-        if isinstance(ref, int) and 0 <= ref < len(payload):
-            return resolve_index(ref)
-        return ref
+        if not (isinstance(ref, int) and 0 <= ref < payload_len):
+            return ref
+        if ref in memo:
+            return memo[ref]
+        value = payload[ref]
+        if isinstance(value, dict):
+            shell: Any = {}
+        elif isinstance(value, list):
+            shell = []
+        else:
+            memo[ref] = value
+            return value
+        memo[ref] = shell
+        pending.append(ref)
+        return shell
+
+    conversation = resolve_ref(conv_index)
+    while pending:
+        index = pending.pop()
+        value = payload[index]
+        output = memo[index]
+        if isinstance(value, dict):
+            for key, ref in value.items():
+                real_key = key_memo.get(key)
+                if real_key is None:
+                    real_key = key_memo[key] = resolve_key(key)
+                output[real_key] = resolve_ref(ref)
+        else:
+            output.extend([resolve_ref(item) for item in value])
 
-    conversation = resolve_index(conv_index)
     if not isinstance(conversation, dict):
         raise ExtractionError("conversation_resolve_failed")
     return conversation
@@ -254,26 +329,37 @@ def collect_main_chain(conversation: dict[str, Any]) -> list[dict[str, Any]]:
     chain: list[dict[str, Any]] = []
     seen: set[str] = set()
     node_id = current
+    empty: dict[str, Any] = {}
 
     while node_id and node_id not in seen and node_id in mapping:
         seen.add(node_id)
         node = mapping[node_id]
         if not isinstance(node, dict):
             break
-        message = node.get("message")
-        if isinstance(message, dict):
-            author = message.get("author") if isinstance(message.get("author"), dict) else {}
-            role = author.get("role")
-            create_time = message.get("create_time")
-            recipient = message.get("recipient")
-            content = message.get("content") if isinstance(message.get("content"), dict) else {}
-            content_type = content.get("content_type")
-            parts = content.get("parts") if isinstance(content.get("parts"), list) else []
-            text = "\n".join(part for part in parts if isinstance(part, str))
-            metadata = message.get("metadata") if isinstance(message.get("metadata"), dict) else {}
-            metadata_attachments = metadata.get("attachments") if isinstance(metadata.get("attachments"), list) else []
-            direct_attachments = message.get("attachments") if isinstance(message.get("attachments"), list) else []
-            attachments = metadata_attachments or direct_attachments
+        get = node.get
+        message = get("message")
+        # Messages without a numeric create_time are dropped from the chain, so skip them early.
+        if isinstance(message, dict) and isinstance(message.get("create_time"), (int, float)):
+            msg_get = message.get
+            author = msg_get("author")
+            if not isinstance(author, dict):
+                author = empty
+            content = msg_get("content")
+            if not isinstance(content, dict):
+                content = empty
+            metadata = msg_get("metadata")
+            if not isinstance(metadata, dict):
+                metadata = empty
+            content_get = content.get
+
+            parts = content_get("parts")
+            text = "\n".join(part for part in parts if isinstance(part, str)) if isinstance(parts, list) else ""
+
+            attachments = metadata.get("attachments")
+            if not isinstance(attachments, list) or not attachments:
+                attachments = msg_get("attachments")
+                if not isinstance(attachments, list):
+                    attachments = []
             upload_names: list[str] = []
             for attachment in attachments:
                 if isinstance(attachment, dict):
@@ -283,18 +369,19 @@ def collect_main_chain(conversation: dict[str, Any]) -> list[dict[str, Any]]:
                         if cleaned:
                             upload_names.append(cleaned)
 
-            thought_items_raw = content.get("thoughts") if isinstance(content.get("thoughts"), list) else []
+            thought_items_raw = content_get("thoughts")
             thought_items: list[dict[str, str]] = []
-            for item in thought_items_raw:
-                if isinstance(item, dict):
-                    summary = item.get("summary")
-                    detail = item.get("content")
-                    thought_items.append(
-                        {
-                            "summary": summary.strip() if isinstance(summary, str) else "",
-                            "content": detail.strip() if isinstance(detail, str) else "",
-                        }
-                    )
+            if isinstance(thought_items_raw, list):
+                for item in thought_items_raw:
+                    if isinstance(item, dict):
+                        summary = item.get("summary")
+                        detail = item.get("content")
+                        thought_items.append(
+                            {
+                                "summary": summary.strip() if isinstance(summary, str) else "",
+                                "content": detail.strip() if isinstance(detail, str) else "",
+                            }
+                        )
 
             reasoning_duration_sec: float | None = None
             finished_duration_sec = metadata.get("finished_duration_sec")
@@ -306,17 +393,15 @@ def collect_main_chain(conversation: dict[str, Any]) -> list[dict[str, Any]]:
                 except ValueError:
                     reasoning_duration_sec = None
 
-            reasoning_recap_text = ""
-            recap_content = content.get("content")
-            if isinstance(recap_content, str):
-                reasoning_recap_text = recap_content.strip()
+            recap_content = content_get("content")
+            reasoning_recap_text = recap_content.strip() if isinstance(recap_content, str) else ""
 
             chain.append(
                 {
-                    "role": role,
-                    "recipient": recipient,
-                    "content_type": content_type,
-                    "create_time": create_time,
+                    "role": author.get("role"),
+                    "recipient": msg_get("recipient"),
+                    "content_type": content_get("content_type"),
+                    "create_time": msg_get("create_time"),
                     "text": text,
                     "uploads": upload_names,
                     "thought_items": thought_items,
@@ -324,10 +409,10 @@ def collect_main_chain(conversation: dict[str, Any]) -> list[dict[str, Any]]:
                     "reasoning_recap_text": reasoning_recap_text,
                 }
             )
-        parent = node.get("parent")
+        parent = get("parent")
         node_id = parent if isinstance(parent, str) else ""
 
-    chain = [item for item in reversed(chain) if isinstance(item.get("create_time"), (int, float))]
+    chain.reverse()
     if not chain:
         raise ExtractionError("empty_chain")
     return chain
@@ -414,61 +499,58 @@ def extract_round_rows(chain: list[dict[str, Any]]) -> list[dict[str, Any]]:
     return rows
 
 
+def format_seconds(value: float) -> str:
+    if value.is_integer():
+        return f"{int(value)}s"
+    display = f"{value:.2f}".rstrip("0").rstrip(".")
+    return f"{display}s"
+
+
 def format_duration_text(duration_seconds: Any, recap_text: Any) -> str:
     if isinstance(duration_seconds, (int, float)):
-        value = float(duration_seconds)
-        if value.is_integer():
-            return f"{int(value)}s"
-        display = f"{value:.2f}".rstrip("0").rstrip(".")
-        return f"{display}s"
+        return format_seconds(float(duration_seconds))
 
     if isinstance(recap_text, str):
         text = recap_text.strip()
         if not text:
             return ""
-        match = re.search(r"thought\s+for\s+([0-9]+(?:\.[0-9]+)?)\s*(?:s|seconds?)", text, re.I)
+        match = THOUGHT_FOR_RE.search(text)
         if match:
-            num = float(match.group(1))
-            if num.is_integer():
-                return f"{int(num)}s"
-            display = f"{num:.2f}".rstrip("0").rstrip(".")
-            return f"{display}s"
+            return format_seconds(float(match.group(1)))
     return ""
 
 
 def build_thought_text(thought_blocks: list[Any], thought_times: list[Any]) -> str:
-    clean_blocks = [str(block).strip() for block in thought_blocks if str(block).strip()]
-    clean_times = [str(value).strip() for value in thought_times if str(value).strip()]
+    clean_blocks = [text for block in thought_blocks if (text := str(block).strip())]
+    clean_times = [text for value in thought_times if (text := str(value).strip())]
 
     if not clean_blocks and not clean_times:
         return "None"
 
-    segments: list[str] = []
-    for idx, block in enumerate(clean_blocks):
-        segment = block
-        if idx < len(clean_times):
-            segment = f"{segment}\n\nThought for {clean_times[idx]}\nDone"
-        segments.append(segment)
-
-    if len(clean_times) > len(clean_blocks):
-        for idx in range(len(clean_blocks), len(clean_times)):
-            segments.append(f"Thought for {clean_times[idx]}\nDone")
+    block_count = len(clean_blocks)
+    time_count = len(clean_times)
+    segments = [""] * max(block_count, time_count)
+    for idx in range(len(segments)):
+        if idx >= block_count:
+            segments[idx] = f"Thought for {clean_times[idx]}\nDone"
+        elif idx < time_count:
+            segments[idx] = f"{clean_blocks[idx]}\n\nThought for {clean_times[idx]}\nDone"
+        else:
+            segments[idx] = clean_blocks[idx]
 
-    return "\n\n".join(segments) if segments else "None"
+    return "\n\n".join(segments)
 
 
 def extract_code_blocks(response_text: str) -> str:
-    if not response_text:
+    if not response_text or "```" not in response_text:
         return ""
-    blocks = [match.group(1).strip("\n") for match in CODE_BLOCK_RE.finditer(response_text)]
-    blocks = [block for block in blocks if block.strip()]
+    blocks = [block.strip("\n") for block in CODE_BLOCK_RE.findall(response_text) if block.strip()]
     return "\n\n".join(blocks)
 
 
 def write_student_workbook(path: Path, name_dot: str, rows: list[dict[str, Any]]) -> None:
-    wb = Workbook()
-    ws = wb.active
-    ws.title = safe_sheet_title(name_dot)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=safe_sheet_title(name_dot))
     headers = [
         "Round",
         "Prompt",
@@ -479,54 +561,129 @@ def write_student_workbook(path: Path, name_dot: str, rows: list[dict[str, Any]]
         "ChatGPT's response code",
     ]
     ws.append(headers)
+    # Write-only sheets serialize each row on append, so one buffer is reused across rows.
+    table = _XML_TABLE
+    buf: list[Any] = [None] * len(headers)
     for row in rows:
-        ws.append(
-            [
-                row["Round"],
-                xml_safe(row["Prompt"]),
-                xml_safe(row["Prompt_upload"]),
-                xml_safe(row["ChatGPT's thought time"]),
-                xml_safe(row["ChatGPT's thought"]),
-                xml_safe(row["ChatGPT's response"]),
-                xml_safe(row["ChatGPT's response code"]),
-            ]
-        )
+        buf[0] = row["Round"]
+        buf[1] = row["Prompt"].translate(table)
+        buf[2] = row["Prompt_upload"].translate(table)
+        buf[3] = row["ChatGPT's thought time"].translate(table)
+        buf[4] = row["ChatGPT's thought"].translate(table)
+        buf[5] = row["ChatGPT's response"].translate(table)
+        buf[6] = row["ChatGPT's response code"].translate(table)
+        ws.append(buf)
     wb.save(path)
     wb.close()
 
 
 def write_status_workbook(path: Path, records: list[StatusRecord]) -> None:
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "status"
-    ws.append(["Name.dot", "Link", "Status", "Reason", "Round_count"])
-    for record in records:
-        ws.append(
+    # Plain values only: keep xlsxwriter from turning links into hyperlinks or "=..." into formulas.
+    wb = xlsxwriter.Workbook(
+        str(path),
+        {"constant_memory": True, "strings_to_urls": False, "strings_to_formulas": False},
+    )
+    ws = wb.add_worksheet("status")
+    ws.write_row(0, 0, ["Name.dot", "Link", "Status", "Reason", "Round_count"])
+    for row_idx, record in enumerate(records, start=1):
+        ws.write_row(
+            row_idx,
+            0,
             [
                 xml_safe(record.name_dot),
                 xml_safe(record.link),
                 xml_safe(record.status),
                 xml_safe(record.reason),
                 record.round_count,
-            ]
+            ],
         )
-    wb.save(path)
     wb.close()
 
 
 def classify_exception(exc: Exception) -> str:
-    if isinstance(exc, urllib.error.HTTPError):
-        return f"http_{exc.code}"
-    if isinstance(exc, urllib.error.URLError):
-        reason = getattr(exc, "reason", None)
-        if reason is not None:
-            return f"url_error:{reason}"
-        return "url_error"
+    if isinstance(exc, asyncio.TimeoutError):
+        return "timeout"
+    if isinstance(exc, aiohttp.ClientError):
+        return f"url_error:{exc}"
     if isinstance(exc, ExtractionError):
         return str(exc)
     return f"{exc.__class__.__name__}:{exc}"
 
 
+def _cpu_worker(name_dot: str, html: str, output_dir: str) -> tuple[str, str, int]:
+    # Runs in a worker process: keep it top-level and return only picklable values.
+    try:
+        payload = decode_payload(html)
+        conversation = get_conversation(payload)
+        chain = collect_main_chain(conversation)
+        rows = extract_round_rows(chain)
+        write_student_workbook(Path(output_dir) / f"{name_dot}.xlsx", name_dot, rows)
+    except Exception as exc:  # noqa: BLE001
+        return "failed", classify_exception(exc), 0
+    return "success", "", len(rows)
+
+
+async def process(
+    target: TargetRecord,
+    session: aiohttp.ClientSession,
+    sem: asyncio.Semaphore,
+    pool: ProcessPoolExecutor,
+    cache: HtmlCache | None,
+    output_dir: Path,
+    retries: int,
+) -> StatusRecord:
+    loop = asyncio.get_running_loop()
+    try:
+        html = await asyncio.to_thread(cache.get, target.link) if cache is not None else None
+        fetched = html is None
+        if html is None:
+            async with sem:
+                html = await fetch_html(session, target.link, retries=retries)
+        status, reason, round_count = await loop.run_in_executor(
+            pool, _cpu_worker, target.name_dot, html, str(output_dir)
+        )
+        # Only cache pages that extracted cleanly, so a challenge page is never replayed.
+        if fetched and cache is not None and status == "success":
+            await asyncio.to_thread(cache.put, target.link, html)
+    except Exception as exc:  # noqa: BLE001
+        status, reason, round_count = "failed", classify_exception(exc), 0
+
+    if status == "success":
+        print(f"[SUCCESS] {target.name_dot}: rounds={round_count} -> {output_dir / f'{target.name_dot}.xlsx'}")
+    else:
+        print(f"[FAILED] {target.name_dot}: {reason}")
+    return StatusRecord(
+        name_dot=target.name_dot,
+        link=target.link,
+        status=status,
+        reason=reason,
+        round_count=round_count,
+    )
+
+
+async def process_all(
+    targets: list[TargetRecord],
+    output_dir: Path,
+    retries: int,
+    timeout: int,
+    concurrency: int,
+    cache: HtmlCache | None,
+) -> list[StatusRecord]:
+    if not targets:
+        return []
+    sem = asyncio.Semaphore(max(concurrency, 1))
+    workers = min(os.cpu_count() or 1, len(targets))
+    connector = aiohttp.TCPConnector(ssl=_SSL_CTX)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        async with aiohttp.ClientSession(connector=connector, timeout=client_timeout) as session:
+            return list(
+                await asyncio.gather(
+                    *(process(target, session, sem, pool, cache, output_dir, retries) for target in targets)
+                )
+            )
+
+
 def run() -> int:
     args = parse_args()
     metadata_path = Path(args.metadata)
@@ -536,15 +693,28 @@ def run() -> int:
 
     students_arg = args.students.strip().lower()
     if students_arg == "all":
-        students = read_all_name_dots(metadata_path)
+        metadata = read_metadata(metadata_path)
+        students = set(metadata)
     else:
         students = {item.strip() for item in args.students.split(",") if item.strip()}
-    targets, status_records = read_targets(metadata_path, students)
+        metadata = read_metadata(metadata_path, students)
+    targets = [TargetRecord(name_dot=name, link=metadata[name]) for name in sorted(students & metadata.keys())]
+    status_records = [
+        StatusRecord(
+            name_dot=student,
+            link="",
+            status="failed",
+            reason="student_not_found",
+            round_count=0,
+        )
+        for student in sorted(students - metadata.keys())
+    ]
 
     print(f"Targets found: {len(targets)} / requested: {len(students)}")
 
+    valid_targets: list[TargetRecord] = []
     for target in targets:
-        if not SHARE_LINK_RE.match(target.link):
+        if not is_valid_share_link(target.link):
             status_records.append(
                 StatusRecord(
                     name_dot=target.name_dot,
@@ -556,37 +726,20 @@ def run() -> int:
             )
             print(f"[FAILED] {target.name_dot}: invalid_share_link")
             continue
-
-        try:
-            html = fetch_html(target.link, retries=args.retries, timeout=args.timeout)
-            payload = decode_payload(html)
-            conversation = get_conversation(payload)
-            chain = collect_main_chain(conversation)
-            rows = extract_round_rows(chain)
-            out_path = output_dir / f"{target.name_dot}.xlsx"
-            write_student_workbook(out_path, target.name_dot, rows)
-            status_records.append(
-                StatusRecord(
-                    name_dot=target.name_dot,
-                    link=target.link,
-                    status="success",
-                    reason="",
-                    round_count=len(rows),
-                )
+        valid_targets.append(target)
+
+    status_records.extend(
+        asyncio.run(
+            process_all(
+                valid_targets,
+                output_dir,
+                retries=args.retries,
+                timeout=args.timeout,
+                concurrency=args.concurrency,
+                cache=None if args.no_cache else HtmlCache(output_dir / ".cache"),
             )
-            print(f"[SUCCESS] {target.name_dot}: rounds={len(rows)} -> {out_path}")
-        except Exception as exc:  # noqa: BLE001
-            reason = classify_exception(exc)
-            status_records.append(
-                StatusRecord(
-                    name_dot=target.name_dot,
-                    link=target.link,
-                    status="failed",
-                    reason=reason,
-                    round_count=0,
-                )
-            )
-            print(f"[FAILED] {target.name_dot}: {reason}")
+        )
+    )
 
     status_records.sort(key=lambda record: record.name_dot)
     write_status_workbook(status_path, status_records)